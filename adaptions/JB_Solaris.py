@@ -4,12 +4,6 @@
 #
 #
 
-# ####This adaptation uses Structural Pattern Matching, available from Python 3.10
-# => reverted back to 3.8-compatible code
-# import sys
-# assert sys.version_info >= (3,10)
-
-
 # see https://owner.johnbowen.com/images//files/Solaris%20SysEx%20v1.2.2.pdf
 
 # STATUS
@@ -35,14 +29,15 @@
 # Bank Dump Capability: as soon as Solaris supports it
 
 from typing import List, Dict, Tuple, Iterator
+import functools
+import re
 import sys
-#TypeAlias # 3.10
 
 # ----------------
 # helper functions
 
+# KnobKraft exchanges lists of ints, internally the data is converted once to bytes
 MidiMessage = List[int]
-#MidiMessage = bytes
 
 def m2str(message:MidiMessage) -> str:
     return ' '.join(f'{m:02x}' for m in message)
@@ -52,42 +47,51 @@ def print_midi(message:MidiMessage) -> None:
     print(m2str(message))
 
 
-def nibblize_str(data:str) -> MidiMessage:
-    nibblized = MidiMessage()
-    for c in data:
-        nibblized += MidiMessage([(ord(c) >> 8) & 0x7f, ord(c) & 0x7f])
-    return nibblized
+# translation table keeping the 7 low bits of each byte
+_MASK_7BIT = bytes(b & 0x7f for b in range(256))
 
 
-def denibblize_str(data:MidiMessage) -> str:
-    denibblized = ""
-    for i in range(0, len(data), 2):
-        c = (data[i] << 8) + data[i+1]
-        denibblized += chr(c)
-    return denibblized
+# Each character is stored as two 7-bit nibbles, which is a big-endian 16-bit lane per character:
+# the UTF-16-BE codec packs and unpacks all the lanes at once
+def nibblize_str(data:str) -> bytes:
+    if max(data, default=' ') > '\uffff':
+        # characters outside of the BMP would be encoded as surrogate pairs
+        return bytes(n for c in data for n in ((ord(c) >> 8) & 0x7f, ord(c) & 0x7f))
+    return data.encode('utf-16-be', 'surrogatepass').translate(_MASK_7BIT)
 
 
-# sysex message iterator through bulk messages
-def nextSysexMessage(messages:MidiMessage, SOX:int=0xf0, EOX:int=0xf7) -> Iterator[Tuple[MidiMessage, slice]]:
-    start = 0
-    read = 0
-    message = MidiMessage()
-    # for i in range(len(messages)):
-    #     b = bytes(messages[i:i+1]) # bytes
-    #     message = message + b
-    for b in messages:
-        message.append(b)
-        if b == SOX:
-            start = read
-        elif b == EOX:
-            yield (message, slice(start, read + 1))
-            message = MidiMessage()
-        read = read + 1
+def denibblize_str(data:bytes) -> str:
+    return data.decode('utf-16-be', 'surrogatepass')
+
 
+# Solaris bulk messages: F0 00 12 34 <device id> 10 11 <high> <middle> <low> ... F7
+_SOLARIS_HEADER = bytes([
+    0xf0,  # Start of SysEx (SOX)
+    0x00, 0x12, 0x34,  # Manufacturer
+])
+_SOLARIS_BULK_DUMP = bytes([
+    0x10,  # Solaris ID
+    0x11,  # Bulk Dump
+])
+_FRAME_END = bytes([0x7f])  # high byte of the Frame End address
 
-def nextSysexMessageReversed(messages:MidiMessage) -> Iterator[Tuple[MidiMessage, slice]]:
-    for message, revslice_ in nextSysexMessage(MidiMessage(reversed(messages)), SOX=0xf7, EOX=0xf0):
-        yield MidiMessage(reversed(message)), revslice_
+
+def _is_bulk_message(data:bytes, start:int=0) -> bool:
+    # checks the message starting at index 'start' in place, the Device ID at start+4 can be anything
+    return data[start:start+4] == _SOLARIS_HEADER and data[start+5:start+7] == _SOLARIS_BULK_DUMP
+
+
+# the checksum makes the 7-bit sum of the address, the data and the checksum itself zero
+def _checksum(*blocks:bytes) -> int:
+    return -sum(sum(block) for block in blocks) & 0x7f
+
+
+# sysex message iterator through bulk messages
+_SYSEX_MESSAGE = re.compile(rb'\xf0[^\xf0\xf7]*\xf7')
+
+def nextSysexMessage(messages:MidiMessage) -> Iterator[Tuple[bytes, slice]]:
+    for match in _SYSEX_MESSAGE.finditer(bytes(messages)):
+        yield match.group(), slice(match.start(), match.end())
 
 
 
@@ -140,135 +144,40 @@ def numberOfPatchesPerBank() -> int:
     return 128
 
 
-def bankDescriptors() -> List[Dict]:
-    # this is the official Factory bank set
-    # TODO: find a way to build it according to the actual location of the bank, maybe by recognizing some preset names?
-    return [
-        {
-            "bank": 0,
-            "name": "John Bowen",
-            "size": 62,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 1,
-            "name": "Marco Paris",
-            "size": 128,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 2,
-            "name": "Carl Lofgren",
-            "size": 91,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 3,
-            "name": "Scarr, Ader, Hummel, Kuchar, Keel",
-            "size": 84,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 4,
-            "name": "Ken Elhardt",
-            "size": 52,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 5,
-            "name": "Jimmy V.",
-            "size": 41,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 6,
-            "name": "Robert Wittek",
-            "size": 51,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 7,
-            "name": "Toby Emerson",
-            "size": 128,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 8,
-            "name": "Christoph Eckert",
-            "size": 95,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 9,
-            "name": "Francois Neumann-rystow",
-            "size": 90,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 10,
-            "name": "Brian Kehew",
-            "size": 0,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 11,
-            "name": "Mike Johnson 1",
-            "size": 128,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 12,
-            "name": "Mike Johnson 2",
-            "size": 128,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 13,
-            "name": "Mike Johnson 3",
-            "size": 128,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 14,
-            "name": "Wouter van Beek",
-            "size": 72,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 15,
-            "name": "??",
-            "size": 0,
-            "type": "Patch",
-            "isROM": False
-        },
-        {
-            "bank": 16,
-            "name": "OSv2 demo",
-            "size": 24,
-            "type": "Patch",
-            "isROM": False
-        },
-    ]
+# this is the official Factory bank set
+# TODO: find a way to build it according to the actual location of the bank, maybe by recognizing some preset names?
+_FACTORY_BANKS = (
+    # name, size
+    ("John Bowen", 62),
+    ("Marco Paris", 128),
+    ("Carl Lofgren", 91),
+    ("Scarr, Ader, Hummel, Kuchar, Keel", 84),
+    ("Ken Elhardt", 52),
+    ("Jimmy V.", 41),
+    ("Robert Wittek", 51),
+    ("Toby Emerson", 128),
+    ("Christoph Eckert", 95),
+    ("Francois Neumann-rystow", 90),
+    ("Brian Kehew", 0),
+    ("Mike Johnson 1", 128),
+    ("Mike Johnson 2", 128),
+    ("Mike Johnson 3", 128),
+    ("Wouter van Beek", 72),
+    ("??", 0),
+    ("OSv2 demo", 24),
+)
+# KnobKraft casts each descriptor to a dict, so they cannot be read-only mapping proxies
+_BANK_DESCRIPTORS = tuple({"bank": bank, "name": name, "size": size, "type": "Patch", "isROM": False}
+                          for bank, (name, size) in enumerate(_FACTORY_BANKS))
+
+
+def bankDescriptors() -> Tuple[Dict, ...]:
+    return _BANK_DESCRIPTORS
 
 
 def bankSelect(channel:int, bank:int) -> MidiMessage:
     # MIDI CC with controller number 32, which is used by many synth as the bank select controller.
-    return MidiMessage([0xb0 | (channel & 0x0f), 32, bank])
+    return [0xb0 | (channel & 0x0f), 32, bank]
 
 
 
@@ -277,38 +186,45 @@ def bankSelect(channel:int, bank:int) -> MidiMessage:
 
 
 # Sending message to force reply by device
+_IDENTITY_REQUEST = bytes([
+    0xf0,  # Start of SysEx (SOX)
+    0x7e,  # Non real time
+    0x7f,  # Device ID (n = 0x00 – 0x0F or 0x7F)
+    0x06,  # General Information
+    0x01,  # Identity Request
+    0xf7   # End of SysEx (EOX)
+])
+
 def createDeviceDetectMessage(channel:int) -> MidiMessage:
-    return MidiMessage([
-        0xf0,  # Start of SysEx (SOX)
-        0x7e,  # Non real time
-        0x7f,  # Device ID (n = 0x00 – 0x0F or 0x7F)
-        0x06,  # General Information
-        0x01,  # Identity Request
-        0xf7   # End of SysEx (EOX)
-    ])
+    # KnobKraft does not accept bytes as a MIDI message, hence the list
+    return list(_IDENTITY_REQUEST)
+
+
+# Identity Reply: F0 7E <device id> 06 02 00 12 34 10 00 01 00 <v1 v2 v3 v4> F7
+_IDENTITY_REPLY_HEADER = bytes([
+    0xf0,  # Start of SysEx (SOX)
+    0x7e,  # Non real time
+])
+_IDENTITY_REPLY_SOLARIS = bytes([
+    0x06,  # General Information
+    0x02,  # Identity Reply
+    0x00, 0x12, 0x34,  # Manufacturer ID
+    0x10, 0x00,  # Device family code (1 = Solaris) (shouldn't it be 0x01 instead??)
+    0x01, 0x00,  # Device family member code (1 = Keyboard)
+])
 
 
 # Checking if reply came
 def channelIfValidDeviceResponse(message:MidiMessage) -> int:
-    # match message:
-    #     case [
-    if len(message) < 16: return -1
-    device_id = message[2]
-    [v1,v2,v3,v4] = message[12:16]
-    if message == [
-            0xf0,  # Start of SysEx (SOX)
-            0x7e,  # Non real time
-            device_id,  # Device ID (n = 0x00 – 0x0F or 0x7F)
-            0x06,  # General Information
-            0x02,  # Identity Reply
-            0x00, 0x12, 0x34,  # Manufacturer ID
-            0x10, 0x00,  # Device family code (1 = Solaris) (shouldn't it be 0x01 instead??)
-            0x01, 0x00,  # Device family member code (1 = Keyboard)
-            v1,v2,v3,v4,  # Software revision level
-            0xf7   # End of SysEx (EOX)
-        ]:
-            print("Solaris id:" + str(device_id) + " OS v" + ".".join((str(m) for m in [v1,v2,v3,v4])))
-            return 1
+    reply = bytes(message)
+    if (len(reply) == 17
+            and reply[0:2] == _IDENTITY_REPLY_HEADER
+            and reply[3:12] == _IDENTITY_REPLY_SOLARIS
+            and reply[16] == 0xf7):  # End of SysEx (EOX)
+        device_id = reply[2]  # Device ID (n = 0x00 – 0x0F or 0x7F)
+        version = reply[12:16]  # Software revision level
+        print("Solaris id:" + str(device_id) + " OS v" + ".".join(str(v) for v in version))
+        return 1
     return -1
 
 
@@ -331,55 +247,34 @@ def needsChannelSpecificDetection() -> bool:
 # The data returned will begin with a Frame Start block followed by all preset blocks and ending with a Frame End block
 
 # Requesting the edit buffer from the synth
+_EDIT_BUFFER_REQUEST = bytes([
+    0xf0,  # Start of SysEx (SOX)
+    0x00, 0x12, 0x34,  # Manufacturer
+    0x7f,  # Device ID
+    0x10,  # Solaris ID
+    0x10,  # Bulk Dump Request
+    0x7e, 0x7f, 0x7f,  # base address of Frame Start (high byte 7E) and bank# = 7F and preset# = 7F
+    0xf7   # End of SysEx (EOX)
+])
+
 def createEditBufferRequest(channel:int) -> MidiMessage:
-    return MidiMessage([
-        0xf0,  # Start of SysEx (SOX)
-        0x00, 0x12, 0x34,  # Manufacturer
-        0x7f,  # Device ID
-        0x10,  # Solaris ID
-        0x10,  # Bulk Dump Request
-        0x7e, 0x7f, 0x7f,  # base address of Frame Start (high byte 7E) and bank# = 7F and preset# = 7F
-        0xf7   # End of SysEx (EOX)
-    ])
+    return list(_EDIT_BUFFER_REQUEST)
 
 
 # Handling edit buffer dumps that consist of more than one MIDI message
 def isPartOfEditBufferDump(message:MidiMessage) -> bool:
-    # match message:
-    #     case [
-    if len(message) < 7: return False
-    device_id = message[4]
-    if message[0:7] == [
-            0xf0,  # Start of SysEx (SOX)
-            0x00, 0x12, 0x34,  # Manufacturer
-            device_id, #_,     # Device ID
-            0x10,  # Solaris ID
-            0x11,  # Bulk Dump Request
-            #*_
-        ]:
-            return True
-    return False
+    return _is_bulk_message(bytes(message[0:7]))
 
 
 # Checking if a MIDI message is an edit buffer dump
 def isEditBufferDump(data:MidiMessage) -> bool:
-    for message, _ in nextSysexMessageReversed(data):
-        # match message:
-        #     case [
-        if len(message) < 8: return False
-        device_id = message[4]
-        if message[0:8] == [
-                0xf0,  # Start of SysEx (SOX)
-                0x00, 0x12, 0x34,  # Manufacturer
-                device_id,     # Device ID
-                0x10,  # Solaris ID
-                0x11,  # Bulk Dump Request
-                0x7f,  # Frame End
-                #*_     # should be 0xf7 (?) # FIXME: actually check it
-            ]:
-                return True
+    # the last message must be the Frame End block
+    buf = bytes(data)
+    end = buf.rfind(0xf7)
+    start = buf.rfind(0xf0, 0, end) if end != -1 else -1
+    if start == -1:
         return False
-    return False
+    return _is_bulk_message(buf, start) and buf[start+7:start+8] == _FRAME_END
 
 
 # Creating the edit buffer to send
@@ -414,67 +309,69 @@ def convertToEditBuffer(channel:int, long_message:MidiMessage) -> MidiMessage:
 # Getting and Setting the patch's name
 
 
+# 20 nibblized spaces, to pad shorter names
+_BLANK_NAME = nibblize_str(' ' * 20)
+
+
 # high 0x20: preset name
 # high 0x17+p: part/layer name
-def _find_name(data:MidiMessage, high:int=0x20, middle:int=0x0, low:int=0x0) -> Tuple[str, slice]:
+# KnobKraft asks for the name, tags and layer names of the same patch one after the other,
+# so the scan is cached by content: the bytes are hashed and compared in C
+@functools.lru_cache(maxsize=64)
+def _find_name(data:bytes, high:int=0x20, middle:int=0x0, low:int=0x0) -> Tuple[str, slice]:
     ''' return (name,slice_): 'name' is denibbled, 20-character long name (inc. spaces), 'slice_' is the slice in the wole data'''
 
     offset = -1
     name = ""
-    for message, slice_ in nextSysexMessage(data):
-        # match message:
-        #     case [
-        if len(message) < 10: continue
-        device_id = message[4]
-        [h, m, l] = message[7:10]
-        if message[0:10] == [
-                0xf0,   # Start of SysEx (SOX)
-                0x00, 0x12, 0x34,  # Manufacturer
-                device_id, #_,      # Device ID
-                0x10,   # Solaris ID,
-                0x11,   # Bulk Dump Request
-                h,m,l,  # Address
-                #*_
-                ]:
-                    if [h, m, l] != [high, middle, low]:
-                        continue
-
-                    # verify checksum
-                    s = sum(message[7:-2]) # 7 = address location
-                    checksum = message[-2]
-
-                    if ((s + checksum) & 0x7f) == 0:
-                        offset = slice_.start + 7 + 3
-                        # Part Name has 20 characters with 2 bytes each
-                        name = denibblize_str(data[offset:offset+40])
-                    else:
-                        print("solaris: bad name '" + denibblize_str(data[offset:offset+40]) + "' checksum " + f'{checksum:02x}')
-                        
-                    break
+    # look for "10 11 <high> <middle> <low>" directly, then check that it follows the header
+    pattern = _SOLARIS_BULK_DUMP + bytes([high, middle, low])
+    pos = data.find(pattern, 5)
+    while pos != -1:
+        start = pos - 5  # 5 = Solaris ID location
+        end = data.find(0xf7, pos)
+        if not _is_bulk_message(data, start) or end == -1:
+            pos = data.find(pattern, pos + 1)
+            continue
+
+        # verify checksum, summing in place without copying the block
+        checksum = data[end-1]
+
+        if _checksum(memoryview(data)[start+7:end-1]) == checksum: # 7 = address location
+            offset = start + 7 + 3
+            # Part Name has 20 characters with 2 bytes each
+            name = denibblize_str(data[offset:offset+40])
+        else:
+            print("solaris: bad name '" + denibblize_str(data[start+10:start+50]) + "' checksum " + f'{checksum:02x}')
+
+        break
     return name, slice(offset, offset+40)
 
 
-def _rename(data:MidiMessage, new_name:str, slice_:slice) -> MidiMessage:
+def _find_name_and_tags(data:bytes) -> Tuple[str, int, int, slice]:
+    ''' return (name,cat1,cat2,slice_): as _find_name for the preset name, with the two categories stored right after it'''
+    name, slice_ = _find_name(data)
+    if slice_.start == -1:
+        return name, 0, 0, slice_
+    return name, data[slice_.stop] & 0x7f, data[slice_.stop+1] & 0x7f, slice_
 
-    # make new_name 20-character long
-    name = new_name.ljust(20)[:20]
 
-    # nibblize it
-    nibblized = nibblize_str(name)
+def _rename(data:bytes, new_name:str, slice_:slice) -> bytearray:
 
-    # compute new checksum
-    categories = data[slice_.stop:slice_.stop+2]
-    s = sum(MidiMessage([0x20,0,0]) + nibblized + categories)
-    checksum = 0x80 - (s & 0x7f)
-    
-    # verify checksum just in case
-    if (s + checksum) & 0x7 != 0:
-        print("solaris: bad new name '" + new_name + "' checksum " + f'{checksum:02x}')
-        #return None
+    # nibblize it, then pad it with nibblized spaces to 20 characters
+    nibblized = (nibblize_str(new_name[:20]) + _BLANK_NAME)[:40]
+
+    # compute new checksum over address + name + categories
+    # the address is not always 20 00 00, and the layer name blocks (17+p 00 00) have no categories:
+    # whatever sits between the name and the checksum is kept
+    address = data[slice_.start-3:slice_.start]
+    checksum_index = data.index(0xf7, slice_.stop) - 1
+    categories = data[slice_.stop:checksum_index]
+    checksum = _checksum(address, nibblized, categories)
 
-    # assemble new data
-    # 1 + 1 + 1 : cat1 + cat2 + 0xf7
-    new_data = data[:slice_.start] + nibblized + categories + MidiMessage([checksum]) + data[slice_.stop+1+1+1:]
+    # copy the data once, then overwrite the name and the checksum in place
+    new_data = bytearray(data)
+    new_data[slice_] = nibblized
+    new_data[checksum_index] = checksum
 
     return new_data
 
@@ -484,7 +381,7 @@ def isDefaultName(patchName:MidiMessage) -> bool:
 
 
 def nameFromDump(data:MidiMessage) -> str:
-    name, slice_ = _find_name(data)
+    name, slice_ = _find_name(bytes(data))
     if slice_.start == -1:
         return "unknown"
 
@@ -492,10 +389,11 @@ def nameFromDump(data:MidiMessage) -> str:
 
 
 def renamePatch(data:MidiMessage, new_name:str) -> MidiMessage:
-    _, slice_ = _find_name(data)
+    buf = bytes(data)
+    _, slice_ = _find_name(buf)
     if slice_.start == -1:
-        return MidiMessage()
-    return _rename(data, new_name, slice_)
+        return []
+    return list(_rename(buf, new_name, slice_))
 
 
 
@@ -509,7 +407,7 @@ def numberOfLayers(messages:MidiMessage) -> int:
 
 def layerName(messages:MidiMessage, layerNo:int) -> str:
     #print("layer:", layerNo, " - ",end="")
-    name, slice_ = _find_name(messages, 0x17, 0x0+layerNo)
+    name, slice_ = _find_name(bytes(messages), 0x17, 0x0+layerNo)
     if slice_.start == -1:
         return "unknown"
 
@@ -517,10 +415,11 @@ def layerName(messages:MidiMessage, layerNo:int) -> str:
 
 
 def setLayerName(messages:MidiMessage, layerNo:int, new_name:str) -> MidiMessage:
-    _, slice_ = _find_name(messages, 0x17, 0x0+layerNo)
+    buf = bytes(messages)
+    _, slice_ = _find_name(buf, 0x17, 0x0+layerNo)
     if slice_.start == -1:
-        return MidiMessage()
-    return _rename(messages, new_name, slice_)
+        return []
+    return list(_rename(buf, new_name, slice_))
 
 
 
@@ -529,12 +428,11 @@ def setLayerName(messages:MidiMessage, layerNo:int, new_name:str) -> MidiMessage
 
 
 # Solaris categories
-_category1 = ["None", "Arpeggio", "Bass", "Drum", "Effect", "Keyboard", "Lead", "Pad", "Sequence", "Texture", "Atmosphere", "Bells", "Mono", "Noise", "Organ", "Percussive", "Strings", "Synth", "Vocal"]
-for i in range(1,11):
-    _category1.append("User " + str(i))
-_category2 = ["Acoustic", "Aggressive", "Big", "Bright", "Chord", "Classic", "Dark", "Electric", "Moody", "Soft", "Short", "Synthetic", "Upbeat", "Metallic", "Template"]
-for i in range(1,11):
-    _category2.append("User " + str(i))
+# padded with empty names to the whole 7-bit range, so that any data byte is a valid index
+_category1 = ("None", "Arpeggio", "Bass", "Drum", "Effect", "Keyboard", "Lead", "Pad", "Sequence", "Texture", "Atmosphere", "Bells", "Mono", "Noise", "Organ", "Percussive", "Strings", "Synth", "Vocal") + tuple("User " + str(i) for i in range(1,11))
+_category1 += ("",) * (0x80 - len(_category1))
+_category2 = ("Acoustic", "Aggressive", "Big", "Bright", "Chord", "Classic", "Dark", "Electric", "Moody", "Soft", "Short", "Synthetic", "Upbeat", "Metallic", "Template") + tuple("User " + str(i) for i in range(1,11))
+_category2 += ("",) * (0x80 - len(_category2))
 
 
 # KnobKraft categories:
@@ -545,12 +443,9 @@ for i in range(1,11):
 # IDEA: reorganize banks according to tag (Keys, Bass, Pad etc.)
 
 def storedTags(message:MidiMessage) -> List[str]:
-    # categories are stored next to the name, so first, get the name position
-    _, slice_ = _find_name(message)
+    _, cat1, cat2, slice_ = _find_name_and_tags(bytes(message))
     if slice_.start == -1:
         return [""]
-    cat1 = message[slice_.stop]
-    cat2 = message[slice_.stop+1]
     return [_category1[cat1], _category2[cat2]]
 
 
@@ -560,27 +455,40 @@ def storedTags(message:MidiMessage) -> List[str]:
 
 
 def run_tests():
-    message1 = [240, 0, 18, 52, 16, 16, 17, 126, 127, 127, 4, 247]
+    message1 = bytes([240, 0, 18, 52, 16, 16, 17, 126, 127, 127, 4, 247])
     for msg, slice_ in nextSysexMessage(message1):
         assert msg == message1
 
     with open("testData/JBSolaris-INIT.syx", "rb") as sysex:
-        raw_data = list(sysex.read())
+        raw_data = sysex.read()
         assert nameFromDump(raw_data) == "INIT"
+        # KnobKraft hands over lists
+        assert nameFromDump(list(raw_data)) == "INIT"
+        assert isEditBufferDump(raw_data)
+        assert storedTags(raw_data) == ['None', 'Acoustic']
 
         # same name produces the same data
         renamed = renamePatch(raw_data, "INIT")
         assert len(raw_data) == len(renamed)
-        assert raw_data == renamed
+        assert raw_data == bytes(renamed)
         check_name = nameFromDump(renamed)
         assert check_name == "INIT"
         
         # different name
         renamed = renamePatch(raw_data, "SolarisINIT")
         assert len(raw_data) == len(renamed)
-        assert raw_data != renamed
+        assert raw_data != bytes(renamed)
         check_name = nameFromDump(renamed)
         assert check_name == "SolarisINIT"
+        assert storedTags(renamed) == ['None', 'Acoustic']
+
+        # layer names have their own blocks, without categories
+        renamed = setLayerName(raw_data, 2, "Layer 3")
+        assert len(raw_data) == len(renamed)
+        assert layerName(renamed, 2) == "Layer 3"
+        assert layerName(renamed, 1) == "INIT"
+        assert nameFromDump(renamed) == "INIT"
+        assert isEditBufferDump(renamed)
     
     # with open("testData/JBSolaris-RotorDreams.syx", "rb") as sysex:
     #     raw_data = list(sysex.read())